@@ -1,21 +1,24 @@
+import os
 import streamlit as st
-import yaml, importlib
-
-# 1. List your local modules that you are actively editing
-import retrieval_utils.retriever
-import generation_utils.generator
-import generation_utils.schema
-import display_utils.ui_components
-
-# 2. Force a reload of each module
-importlib.reload(retrieval_utils.retriever)
-importlib.reload(generation_utils.generator)
-importlib.reload(generation_utils.schema)
-importlib.reload(display_utils.ui_components)
-
-# 3. NOW perform your "from ... import ..." as usual
+import yaml
+
+# Dev-only module reloads: Streamlit reruns this script on every widget
+# interaction, so an unconditional reload re-pays the import cost per click.
+# Set CAKE_DEV=1 while editing the local modules to get hot reloading back.
+if os.getenv("CAKE_DEV"):
+    import importlib
+    import retrieval_utils.retriever
+    import generation_utils.generator
+    import generation_utils.schema
+    import display_utils.ui_components
+
+    for _mod in (retrieval_utils.retriever, generation_utils.generator,
+                 generation_utils.schema, display_utils.ui_components):
+        importlib.reload(_mod)
+
+# Perform your "from ... import ..." as usual
 from retrieval_utils.retriever import retrieve_data, rank_datasets
-from generation_utils.generator import StudentGenerator
+from generation_utils.generator import StudentGenerator, build_context
 from generation_utils.schema import Response
 from display_utils.ui_components import (
     apply_custom_css,
@@ -63,8 +66,49 @@ def load_system():
     return system_config, student_agent
 
 
+@st.cache_resource
+def get_embedder(model_name: str):
+    """
+    Loads the SentenceTransformer once per model name.
+    Cached separately from load_system so retrieval reuses the live
+    instance instead of reloading the model on every query.
+    """
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+# --- Query Cache ---
+# Repeat queries skip the embed -> Chroma -> LLM pipeline entirely.
+# Leading underscores keep the unhashable model/student out of the cache key.
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def cached_retrieve(query, db_path, collection_name, model_name, num_docs, chunks_per_doc, _model):
+    return retrieve_data(
+        query=query,
+        db_path=db_path,
+        collection_name=collection_name,
+        model=_model,
+        model_name=model_name,
+        num_docs=num_docs,
+        chunks_per_doc=chunks_per_doc
+    )
+
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def cached_generate(query, context_str, _student):
+    result = _student.generate(query=query, context=context_str, schema=Response)
+    # generate_structured swallows provider errors and returns an empty
+    # Response sentinel. Raise instead of returning it: st.cache_data does
+    # not cache exceptions, so a retry re-calls the LLM rather than serving
+    # the failed result for the whole TTL.
+    if getattr(result, "answer", None) is None:
+        raise RuntimeError("LLM generation failed (empty response) — please retry.")
+    return result
+
+
 # Load everything once
 sys_cfg, student = load_system()
+embedder = get_embedder(sys_cfg["EMBEDDING_MODEL"])
 
 # --- Main UI Loop ---
 query_text, search_btn = render_search_bar()
@@ -72,27 +116,31 @@ query_text, search_btn = render_search_bar()
 if search_btn and query_text:
     with st.spinner("🔍 Searching & Generating Answer..."):
         try:
-            # A. Retrieval
-            retrieved_data = retrieve_data(
-                query=query_text,
+            # Normalize whitespace so trivially-reworded repeats hit the cache
+            norm_query = " ".join(query_text.split())
+
+            # A. Retrieval (cached per query)
+            retrieved_data = cached_retrieve(
+                query=norm_query,
                 db_path=sys_cfg["DB_PATH"],
                 collection_name=sys_cfg["COLLECTION_NAME"],
                 model_name=sys_cfg["EMBEDDING_MODEL"],
                 num_docs=sys_cfg["NUM_DOCS"],
-                chunks_per_doc=sys_cfg["CHUNKS_PER_DOC"]
+                chunks_per_doc=sys_cfg["CHUNKS_PER_DOC"],
+                _model=embedder
             )
 
             # B. Ranking
             ranked_data = rank_datasets(retrieved_data)
 
-            # C. Generation (Structured)
-            # Convert ranked objects to string context for the LLM
-            context_str = str(ranked_data)
+            # C. Generation (Structured, cached per query + context)
+            # Serialize only the fields the LLM needs — fewer input tokens
+            context_str = build_context(ranked_data)
 
-            answer_object = student.generate(
-                query=query_text,
-                context=context_str,
-                schema=Response
+            answer_object = cached_generate(
+                query=norm_query,
+                context_str=context_str,
+                _student=student
             )
 
             # --- Display Results ---
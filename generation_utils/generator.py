@@ -1,7 +1,32 @@
+import asyncio
 from generation_utils.llm_client import LLMClient
-from typing import Optional, Type, Union
+from typing import List, Optional, Type, Union
 from pydantic import BaseModel
 
+def build_context(ranked, max_chunks_per_ds: int = 3, max_chars: int = 6000) -> str:
+    """
+    Serializes ranked datasets into a compact markdown context for the LLM.
+    Only the dataset id and chunk texts go in — repr noise (field names,
+    scores, pydantic class names) just burns input tokens.
+    """
+    sections = []
+    total_chars = 0
+    for ds in ranked:
+        lines = [f"## {ds.dataset_id}"]
+        for chunk in ds.top_chunks[:max_chunks_per_ds]:
+            lines.append(f"- {chunk['text']}")
+        section = "\n".join(lines)
+        if total_chars + len(section) > max_chars:
+            if not sections:
+                # Never hand the LLM an empty context when retrieval
+                # succeeded — keep the top dataset, truncated to budget
+                sections.append(section[:max_chars])
+            break
+        sections.append(section)
+        total_chars += len(section) + 2  # account for the joining blank line
+    return "\n\n".join(sections)
+
+
 class StudentGenerator:
     def __init__(self, provider: str, model_name: str):
         """
@@ -20,4 +45,14 @@ class StudentGenerator:
         response = self.llm.generate_text(prompt, system_instruction=system_instr)
         if response is None:
             return "Error: The LLM returned no response."
-        return response
\ No newline at end of file
+        return response
+
+    def generate_many(self, queries: List[str], contexts: List[str],
+                      schema: Optional[Type[BaseModel]] = None, concurrency: int = 20) -> List[Union[str, BaseModel]]:
+        """Answers many (query, context) pairs concurrently via the async client."""
+        system_instr = "You are a helpful assistant. Answer based strictly on the context provided."
+        prompts = [f"Context:\n{ctx}\n\nUser question: {q}\n" for q, ctx in zip(queries, contexts)]
+        return asyncio.run(
+            self.llm.generate_many(prompts, schema_model=schema,
+                                   system_instruction=system_instr, concurrency=concurrency)
+        )
\ No newline at end of file
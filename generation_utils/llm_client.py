@@ -1,38 +1,17 @@
-import os, json
-from typing import Type, Any
+import os, json, asyncio, time, tempfile
+from typing import List, Type, Any
 from dotenv import load_dotenv
 from pydantic import BaseModel
 import streamlit as st
-from generation_utils.schema import Response
+from generation_utils.schema import Response, RESPONSE_ADAPTER
 
-# --- IMPORTS FOR PROVIDERS ---
-try:
-    from google import genai
+# Provider SDKs are imported lazily inside _init_client: each one pulls in a
+# heavy dependency tree, and only the active provider's should be paid for.
 
-    HAS_GEMINI = True
-except ImportError:
-    HAS_GEMINI = False
-
-try:
-    from openai import OpenAI
-
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
-
-try:
-    import anthropic
-
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
-
-try:
-    from groq import Groq
-
-    HAS_GROQ = True
-except ImportError:
-    HAS_GROQ = False
+# Built once at import: pydantic v2 regenerates the JSON schema on every
+# model_json_schema() call; RESPONSE_ADAPTER (from schema.py) covers the
+# json.loads-free validation path
+_RESPONSE_SCHEMA = Response.model_json_schema()
 
 
 class LLMClient:
@@ -49,24 +28,40 @@ class LLMClient:
             return os.getenv(env_name) or st.secrets.get("gkeys", {}).get(secret_path) or st.secrets.get(env_name)
 
         if self.provider == "gemini":
-            if not HAS_GEMINI: raise ImportError("Run `pip install google-genai`")
+            try:
+                from google import genai
+            except ImportError:
+                raise ImportError("Run `pip install google-genai`")
             api_key = get_key("GEMINI_API_KEY", "gemini")
             self.client = genai.Client(api_key=api_key)
+            self.async_client = self.client.aio  # genai exposes the async surface on .aio
 
         elif self.provider == "openai":
-            if not HAS_OPENAI: raise ImportError("Run `pip install openai`")
+            try:
+                from openai import OpenAI, AsyncOpenAI
+            except ImportError:
+                raise ImportError("Run `pip install openai`")
             api_key = get_key("OPENAI_API_KEY", "openai")
             self.client = OpenAI(api_key=api_key)
+            self.async_client = AsyncOpenAI(api_key=api_key)
 
         elif self.provider == "anthropic":
-            if not HAS_ANTHROPIC: raise ImportError("Run `pip install anthropic`")
+            try:
+                import anthropic
+            except ImportError:
+                raise ImportError("Run `pip install anthropic`")
             api_key = get_key("ANTHROPIC_API_KEY", "anthropic")
             self.client = anthropic.Anthropic(api_key=api_key)
+            self.async_client = anthropic.AsyncAnthropic(api_key=api_key)
 
         elif self.provider == "groq":
-            if not HAS_GROQ: raise ImportError("Run `pip install groq`")
+            try:
+                from groq import Groq, AsyncGroq
+            except ImportError:
+                raise ImportError("Run `pip install groq`")
             api_key = get_key("GROQ_API_KEY", "groq")
             self.client = Groq(api_key=api_key)
+            self.async_client = AsyncGroq(api_key=api_key)
 
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
@@ -149,11 +144,11 @@ class LLMClient:
                         "type": "json_schema",
                         "json_schema": {
                             "name": "Response",
-                            "schema": Response.model_json_schema()
+                            "schema": _RESPONSE_SCHEMA
                         }
                     }
                 )
-                response_formatted = Response.model_validate(json.loads(response.choices[0].message.content))
+                response_formatted = RESPONSE_ADAPTER.validate_json(response.choices[0].message.content)
                 return response_formatted
 
             else:
@@ -162,4 +157,202 @@ class LLMClient:
         except Exception as e:
             print(f"⚠️ Structured Generation Error: {e}")
             # Return empty model on failure to prevent crash
-            return schema_model.model_construct()
\ No newline at end of file
+            return schema_model.model_construct()
+
+    async def _generate_one_async(self, prompt: str, schema_model: Type[BaseModel] = None,
+                                  system_instruction: str = None) -> Any:
+        """Async mirror of generate_text / generate_structured for one prompt."""
+        try:
+            # --- GEMINI ---
+            if self.provider == "gemini":
+                config = None
+                if schema_model:
+                    config = {
+                        "response_mime_type": "application/json",
+                        "response_schema": schema_model
+                    }
+                response = await self.async_client.models.generate_content(
+                    model=self.model_name, contents=prompt, config=config
+                )
+                return schema_model.model_validate_json(response.text) if schema_model else response.text
+
+            # --- OPENAI ---
+            elif self.provider == "openai":
+                messages = [{"role": "user", "content": prompt}]
+                if system_instruction:
+                    messages.insert(0, {"role": "system", "content": system_instruction})
+                if schema_model:
+                    completion = await self.async_client.beta.chat.completions.parse(
+                        model=self.model_name, messages=messages, response_format=schema_model
+                    )
+                    return completion.choices[0].message.parsed
+                res = await self.async_client.chat.completions.create(
+                    model=self.model_name, messages=messages
+                )
+                return res.choices[0].message.content
+
+            # --- ANTHROPIC ---
+            elif self.provider == "anthropic":
+                if schema_model:
+                    raise NotImplementedError("Structured output only supported for Gemini, Groq, and OpenAI.")
+                res = await self.async_client.messages.create(
+                    model=self.model_name, max_tokens=1024,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+                return res.content[0].text
+
+            # --- GROQ ---
+            elif self.provider == "groq":
+                if schema_model:
+                    messages = [
+                        {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
+                        {"role": "user", "content": prompt}
+                    ]
+                    response = await self.async_client.chat.completions.create(
+                        model=self.model_name,
+                        messages=messages,
+                        response_format={
+                            "type": "json_schema",
+                            "json_schema": {
+                                "name": "Response",
+                                "schema": _RESPONSE_SCHEMA
+                            }
+                        }
+                    )
+                    return RESPONSE_ADAPTER.validate_json(response.choices[0].message.content)
+                messages = [{"role": "user", "content": prompt}]
+                if system_instruction:
+                    messages.insert(0, {"role": "system", "content": system_instruction})
+                res = await self.async_client.chat.completions.create(
+                    model=self.model_name, messages=messages
+                )
+                return res.choices[0].message.content
+
+        except Exception as e:
+            if schema_model:
+                print(f"⚠️ Structured Generation Error: {e}")
+                return schema_model.model_construct()
+            return f"Error: {e}"
+
+    async def generate_many(self, prompts: List[str], schema_model: Type[BaseModel] = None,
+                            system_instruction: str = None, concurrency: int = 20) -> List[Any]:
+        """
+        Runs many prompts concurrently. The provider SDKs are non-blocking,
+        so this overlaps network I/O instead of serializing each round trip;
+        the semaphore keeps us under rate limits.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _bounded(prompt):
+            async with semaphore:
+                return await self._generate_one_async(prompt, schema_model, system_instruction)
+
+        return await asyncio.gather(*(_bounded(p) for p in prompts))
+
+    def submit_batch(self, prompts: List[str], schema_model: Type[BaseModel] = None,
+                     poll_interval: int = 30) -> List[Any]:
+        """
+        Bulk offline generation via the provider's Batch API (~50% cheaper,
+        built for high-throughput eval/ingestion workloads). Blocks until the
+        batch finishes and returns results in prompt order.
+        """
+        if self.provider == "openai":
+            return self._submit_batch_openai(prompts, schema_model, poll_interval)
+        elif self.provider == "anthropic":
+            if schema_model:
+                raise NotImplementedError("Structured output only supported for Gemini, Groq, and OpenAI.")
+            return self._submit_batch_anthropic(prompts, poll_interval)
+        else:
+            raise NotImplementedError("Batch API only supported for OpenAI and Anthropic.")
+
+    def _submit_batch_openai(self, prompts: List[str], schema_model: Type[BaseModel],
+                             poll_interval: int) -> List[Any]:
+        body_extra = {}
+        if schema_model:
+            body_extra["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": schema_model.__name__,
+                    "schema": schema_model.model_json_schema()
+                }
+            }
+
+        # 1. Write the request JSONL and upload it
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            for i, prompt in enumerate(prompts):
+                f.write(json.dumps({
+                    "custom_id": f"req-{i}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model_name,
+                        "messages": [{"role": "user", "content": prompt}],
+                        **body_extra
+                    }
+                }) + "\n")
+            input_path = f.name
+
+        try:
+            with open(input_path, "rb") as f:
+                input_file = self.client.files.create(file=f, purpose="batch")
+        finally:
+            os.unlink(input_path)
+
+        # 2. Create the batch job and poll until done
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"📦 OpenAI batch {batch.id} submitted ({len(prompts)} requests)")
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+
+        # 3. Parse the output JSONL back into prompt order
+        results = [None] * len(prompts)
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            idx = int(row["custom_id"].split("-")[1])
+            response = row.get("response")
+            if row.get("error") or not response:
+                results[idx] = f"Error: batch request {row['custom_id']} failed"
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[idx] = schema_model.model_validate_json(content) if schema_model else content
+
+        # Requests routed to the error file never appear in the output file
+        for i, res in enumerate(results):
+            if res is None:
+                results[i] = f"Error: batch request req-{i} failed"
+        return results
+
+    def _submit_batch_anthropic(self, prompts: List[str], poll_interval: int) -> List[Any]:
+        batch = self.client.messages.batches.create(
+            requests=[{
+                "custom_id": f"req-{i}",
+                "params": {
+                    "model": self.model_name,
+                    "max_tokens": 1024,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            } for i, prompt in enumerate(prompts)]
+        )
+        print(f"📦 Anthropic batch {batch.id} submitted ({len(prompts)} requests)")
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        results = [None] * len(prompts)
+        for entry in self.client.messages.batches.results(batch.id):
+            idx = int(entry.custom_id.split("-")[1])
+            if entry.result.type == "succeeded":
+                results[idx] = entry.result.message.content[0].text
+            else:
+                results[idx] = f"Error: batch request {entry.custom_id} {entry.result.type}"
+        return results
\ No newline at end of file
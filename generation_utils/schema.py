@@ -1,17 +1,25 @@
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
 from typing import List, Optional
 
 class DatasetSummary(BaseModel):
     """Summarizes a specific dataset and its most relevant evidence."""
+    model_config = ConfigDict(frozen=True, extra='ignore', str_strip_whitespace=True)
+
     name: Optional[str] = Field(None,description="dataset_id from the retrieval")
     summary: Optional[str] = Field(None,description="A summary of the dataset content relevant to the query based on its returned chunks")
     quote: Optional[str] = Field(None,description="Top-ranked chunk quoted from the dataset")
 
 class Response(BaseModel):
     """The structured final response containing the answer and supporting evidence."""
+    model_config = ConfigDict(frozen=True, extra='ignore', str_strip_whitespace=True)
+
     answer: Optional[str] = Field(None,description="A concise and factual answer to the user's question based on retrieval")
     name_top: Optional[str] = Field(None,description="dataset_id from the top retrieval")
     supporting_datasets: List[DatasetSummary] = Field(
         default_factory=list,
         description="Supporting evidence list"
-    )
\ No newline at end of file
+    )
+
+
+# Compiled once at import; validate_json parses straight through pydantic-core
+RESPONSE_ADAPTER = TypeAdapter(Response)
\ No newline at end of file
@@ -2,27 +2,46 @@ import os
 import re
 import hashlib
 import tiktoken
+import numpy as np
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
 from pathlib import Path
 from bs4 import BeautifulSoup
-from nltk.tokenize import sent_tokenize
 from typing import List, Any
 from io_utils.load_db import load_embedding_model, get_db_collection, get_or_create_collection
 
 
 # --- Text Processing Functions (Same as before) ---
 
+# Precompiled patterns (clean_text / filter_noise run per line on large PDFs)
+_RE_WS = re.compile(r'[ \t]+')
+_RE_NUM = re.compile(r'^\d+[\.\)]')
+# Sentence boundary: terminator + whitespace + likely sentence opener.
+# One compiled scanner replaces NLTK's per-call punkt machinery.
+_RE_SENT = re.compile(r'(?<=[.!?])[\s\n]+(?=[A-Z0-9"\'(‘“])')
+
+
+def _split_sentences(text: str) -> List[str]:
+    return [s for s in _RE_SENT.split(text) if s.strip()]
+
 def extract_text_from_html(path: str) -> str:
     if not os.path.exists(path):
         return ""
     with open(path, "r", encoding="utf-8") as f:
         html = f.read()
-    soup = BeautifulSoup(html, "html.parser")
+    # lxml is a C parser — far faster than html.parser on large pages
+    soup = BeautifulSoup(html, "lxml")
     for tag in soup(["script", "style", "noscript", "header", "footer", "nav"]):
         tag.extract()
     return soup.get_text(separator="\n", strip=True)
 
 
+# Plain text is all downstream cleaning needs: dehyphenate line breaks,
+# clip to the mediabox, and skip the layout sort
+_PDF_TEXT_FLAGS = fitz.TEXT_DEHYPHENATE | fitz.TEXT_MEDIABOX_CLIP
+
+
 def extract_text_from_pdf(path: str) -> str:
     """
     Opens a PDF file and extracts text from all pages.
@@ -31,15 +50,13 @@ def extract_text_from_pdf(path: str) -> str:
         print(f"⚠️ Warning: File not found at {path}")
         return ""
 
-    text_content = []
-
     try:
         # Open the PDF document
         with fitz.open(path) as doc:
-            for page in doc:
+            text_content = [None] * len(doc)
+            for i, page in enumerate(doc):
                 # Extract text from the current page
-                page_text = page.get_text("text")
-                text_content.append(page_text)
+                text_content[i] = page.get_text("text", flags=_PDF_TEXT_FLAGS, sort=False)
 
         # Join all pages with a newline separator
         return "\n".join(text_content).strip()
@@ -48,54 +65,74 @@ def extract_text_from_pdf(path: str) -> str:
         print(f"❌ Error reading PDF {path}: {e}")
         return ""
 
-def clean_text(text: str) -> str:
-    text = re.sub(r'\n{2,}', '\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
-    text = re.sub(r'\f', '', text)
-    return text.strip()
-
+def normalize_text(text: str) -> str:
+    """
+    Cleans and de-noises raw text in a single pass over the lines
+    (fuses the old clean_text + filter_noise pair, which each walked
+    the whole buffer separately).
+    """
+    def _clean_lines():
+        for raw_line in text.translate({0x0c: None}).splitlines():
+            s = raw_line.strip()
+            if not s: continue
+            if _RE_NUM.match(s): continue
+            if len(s) < 30 and s.isupper(): continue
+            s_upper = s.upper()
+            if "REFERENCES" in s_upper or "TABLE" in s_upper: continue
+            yield _RE_WS.sub(' ', s)
 
-def filter_noise(text: str) -> str:
-    lines = text.split("\n")
-    clean_lines = []
-    for ln in lines:
-        s = ln.strip()
-        if not s: continue
-        if re.match(r'^\d+[\.\)]', s): continue
-        if len(s) < 30 and s.isupper(): continue
-        if "REFERENCES" in s.upper() or "TABLE" in s.upper(): continue
-        clean_lines.append(ln)
-    return "\n".join(clean_lines)
+    return "\n".join(_clean_lines())
 
 
 def _deduplicate_chunks(chunks: List[str]) -> List[str]:
     seen = set()
     unique = []
     for c in chunks:
-        h = hashlib.md5(c.encode("utf-8")).hexdigest()
+        # 8-byte BLAKE2b digest: much faster than MD5 and no hex allocation
+        h = hashlib.blake2b(c.encode("utf-8"), digest_size=8).digest()
         if h not in seen:
             seen.add(h)
             unique.append(c)
     return unique
 
 
+@lru_cache(maxsize=4)
+def _get_encoder(name: str):
+    """Caches the tiktoken encoder (get_encoding is expensive to rebuild)."""
+    return tiktoken.get_encoding(name)
+
+
 def chunk_text(text: str, tokenizer_name: str = "cl100k_base", max_tokens: int = 256, overlap: int = 40) -> List[str]:
-    enc = tiktoken.get_encoding(tokenizer_name)
-    sentences = sent_tokenize(text)
+    enc = _get_encoder(tokenizer_name)
+    sentences = _split_sentences(text)
+    if not sentences:
+        return []
+
+    # One batched Rust call instead of one encode per sentence
+    sent_lens = [len(toks) for toks in enc.encode_batch(sentences, num_threads=os.cpu_count())]
+
     chunks = []
     current = []
+    current_lens = []
     current_tokens = 0
 
-    for sent in sentences:
-        sent_len = len(enc.encode(sent))
+    for sent, sent_len in zip(sentences, sent_lens):
         if sent_len > max_tokens: continue
         if current_tokens + sent_len > max_tokens:
-            full_chunk = " ".join(current)
-            chunks.append(full_chunk)
-            overlap_txt = full_chunk[-overlap:] if len(full_chunk) > overlap else full_chunk
-            current = [overlap_txt]
-            current_tokens = len(enc.encode(overlap_txt))
+            chunks.append(" ".join(current))
+            # Carry trailing whole sentences whose token total fits the overlap
+            # budget — reuses the precomputed lengths, so no re-encoding, and
+            # the overlap is measured in tokens rather than characters
+            carried = 0
+            carry_from = len(current)
+            while carry_from > 0 and carried + current_lens[carry_from - 1] <= overlap:
+                carry_from -= 1
+                carried += current_lens[carry_from]
+            current = current[carry_from:]
+            current_lens = current_lens[carry_from:]
+            current_tokens = carried
         current.append(sent)
+        current_lens.append(sent_len)
         current_tokens += sent_len
 
     if current: chunks.append(" ".join(current))
@@ -104,20 +141,91 @@ def chunk_text(text: str, tokenizer_name: str = "cl100k_base", max_tokens: int =
 
 # --- Database Interaction ---
 
-def embed_and_upsert(chunks: List[str], collection: Any, embedding_model: Any, model_name: str, source_filename: str):
+# Chroma enforces a per-call batch ceiling (~41,666 rows); 5000-row slices
+# stay well under it while still amortizing per-call overhead
+_CHROMA_ADD_BATCH = 5000
+
+
+def _add_in_batches(collection: Any, ids: List[str], embeddings: Any, documents: List[str], metadatas: List[dict]):
+    # Row slices of the embeddings array are zero-copy numpy views,
+    # so each add hands Chroma a window into the one big block
+    for start in range(0, len(ids), _CHROMA_ADD_BATCH):
+        end = start + _CHROMA_ADD_BATCH
+        collection.add(
+            ids=ids[start:end],
+            embeddings=embeddings[start:end],
+            documents=documents[start:end],
+            metadatas=metadatas[start:end]
+        )
+
+def embed_and_upsert(chunks: List[str], ids: List[str], metadatas: List[dict], collection: Any, embedding_model: Any, model_name: str):
+    """
+    Embeds ALL chunks in one batched encode call and pushes them to Chroma
+    in slices. One big batch keeps the embedding model's device busy instead
+    of feeding it a few chunks per file.
+    """
     if not chunks: return
 
-    # Prefix handling for E5 models
-    doc_prefix = "passage: " if "e5" in model_name.lower() else ""
-    texts_to_embed = [f"{doc_prefix}{c}" for c in chunks]
+    # Prefix handling for E5 models; everyone else reuses the chunk list
+    # as-is instead of allocating a prefixed copy of every string
+    if "e5" in model_name.lower():
+        texts_to_embed = ["passage: " + c for c in chunks]
+    else:
+        texts_to_embed = chunks
+
+    embeddings = embedding_model.encode(
+        texts_to_embed,
+        batch_size=256,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    # Normalized embeddings lose next to no recall at fp16, and halving
+    # the bytes halves both the insert I/O and the resident index size.
+    # ascontiguousarray casts and guarantees a C-contiguous block in one
+    # step, so Chroma's native layer takes zero-copy views of the slices.
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float16)
+
+    _add_in_batches(collection, ids, embeddings, chunks, metadatas)
+    print(f"   ✅ Saved {len(chunks)} chunks.")
 
-    embeddings = embedding_model.encode(texts_to_embed, convert_to_numpy=True)
 
-    ids = [f"{source_filename}_{i}" for i in range(len(chunks))]
-    metadatas = [{"dataset": source_filename}] * len(chunks)
+# Fingerprints of every paragraph seen so far in this ingestion run.
+# Shared boilerplate (headers, disclaimers, reference lists) repeats across
+# files; dropping it here means it's never tokenized or embedded at all.
+_seen_paragraph_hashes: set = set()
+
+
+def _drop_seen_paragraphs(text: str) -> str:
+    fresh = []
+    for para in text.split("\n"):
+        h = hashlib.blake2b(para.encode("utf-8"), digest_size=8).digest()
+        if h in _seen_paragraph_hashes:
+            continue
+        _seen_paragraph_hashes.add(h)
+        fresh.append(para)
+    return "\n".join(fresh)
 
-    collection.add(ids=ids, embeddings=embeddings, documents=chunks, metadatas=metadatas)
-    print(f"   ✅ Saved {len(chunks)} chunks.")
+
+def _prepare_file(file_path: Path, data_root: Path):
+    """
+    Extract -> Clean -> Filter for one file.
+    Module-level so ProcessPoolExecutor can pickle it. Chunking happens in
+    the parent process so the cross-file paragraph dedup can run first.
+    """
+    # Create a readable name: "Subfolder/Filename"
+    relative_path = file_path.relative_to(data_root)
+    readable_source_name = str(relative_path).replace("\\", "/")  # Use forward slashes for readability
+
+    ext = file_path.suffix.lower()
+    if ext == ".html":
+        raw_text = extract_text_from_html(str(file_path))
+    elif ext == ".pdf":
+        raw_text = extract_text_from_pdf(str(file_path))
+    else:
+        return readable_source_name, ""  # Skip unsupported files
+
+    return readable_source_name, normalize_text(raw_text)
 
 
 # --- 🚀 MASTER INGESTION FUNCTION ---
@@ -145,27 +253,26 @@ def run_ingestion(
     all_files = [f for f in data_path.rglob("*") if f.is_file()]
     print(f"\n🚀 Found {len(all_files)} files in subdirectories. Starting ingestion...\n")
 
-    # 3. Process Loop
-    for file_path in all_files:
-        # Create a readable name: "Subfolder/Filename"
-        # .relative_to(data_dir) keeps only the path after the main data folder
-        relative_path = file_path.relative_to(data_path)
-        readable_source_name = str(relative_path).replace("\\", "/")  # Use forward slashes for readability
+    # 3. Process Loop: extract + clean files in parallel (CPU-bound, independent
+    # per file), dedup shared boilerplate across files, then chunk and collect
+    # everything for one batched embed
+    worker = partial(_prepare_file, data_root=data_path)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        prepared = list(executor.map(worker, all_files, chunksize=4))
 
-        print(f"📄 Processing: {readable_source_name}")
+    _seen_paragraph_hashes.clear()  # fresh fingerprints per ingestion run
 
-        # Pipeline: Extract -> Clean -> Filter -> Chunk
-        ext = file_path.suffix.lower()
+    all_chunks = []
+    all_ids = []
+    all_metas = []
 
-        if ext == ".html":
-            raw_text = extract_text_from_html(str(file_path))
-        elif ext == ".pdf":
-            raw_text = extract_text_from_pdf(str(file_path))
-        else:
-            continue  # Skip unsupported files
+    for readable_source_name, filtered_txt in prepared:
+        if not filtered_txt:
+            continue
 
-        clean_txt = clean_text(raw_text)
-        filtered_txt = filter_noise(clean_txt)
+        # Drop paragraphs already seen in earlier files before paying
+        # tokenizer cost on them
+        filtered_txt = _drop_seen_paragraphs(filtered_txt)
 
         chunks = chunk_text(
             filtered_txt,
@@ -173,15 +280,26 @@ def run_ingestion(
             max_tokens=chunk_size,
             overlap=chunk_overlap
         )
-
-        # Database Upsert
-        embed_and_upsert(
-            chunks=chunks,
-            collection=collection,
-            embedding_model=model,
-            model_name=embedding_model_name,
-            source_filename=readable_source_name  # Now includes the subfolder path
-        )
+        if not chunks:
+            continue
+        print(f"📄 Processed: {readable_source_name} ({len(chunks)} chunks)")
+
+        # Accumulate for one batched embed at the end
+        for i, c in enumerate(chunks):
+            all_chunks.append(c)
+            all_ids.append(f"{readable_source_name}_{i}")
+            all_metas.append({"dataset": readable_source_name})  # Now includes the subfolder path
+
+    # 4. Single batched embed + sliced insert
+    print(f"\n🧠 Embedding {len(all_chunks)} chunks in one batch...")
+    embed_and_upsert(
+        chunks=all_chunks,
+        ids=all_ids,
+        metadatas=all_metas,
+        collection=collection,
+        embedding_model=model,
+        model_name=embedding_model_name
+    )
 
     count = collection.count()
     print(f"\n✅ Ingestion Complete! Collection '{collection_name}' now contains {count} chunks.")
\ No newline at end of file
@@ -1,12 +1,10 @@
-from io_utils.load_db import load_embedding_model, get_db_collection, get_or_create_collection
+from io_utils.load_db import get_db_collection, get_or_create_collection
 from collections import defaultdict
 from pydantic import BaseModel
 from typing import List, Dict, Any
 
-# --- Internal Cache to prevent reloading model every time ---
+# --- Internal Cache to prevent reloading the collection every time ---
 _global_cache = {
-    "encoder": None,
-    "model_name": None,
     "collection": None,
     "collection_name": None
 }
@@ -46,13 +44,15 @@ def retrieve_data(
         query: str,
         db_path: str,
         collection_name: str,
+        model: Any,
         model_name: str,
         num_docs: int = 5,
         chunks_per_doc: int = 3
 ) -> List[RetrievalResult]:
     """
-    Retrieves data based on string parameters.
-    Automatically handles loading (and caching) the DB and Model.
+    Retrieves data using a live embedding model instance.
+    The caller owns the model (e.g. behind st.cache_resource);
+    the Chroma collection is still cached here.
     """
     if not query.strip():
         return []
@@ -60,17 +60,12 @@ def retrieve_data(
     # 1. Lazy Load & Cache Resources
     global _global_cache
 
-    # Load Model if changed or not loaded
-    if _global_cache["model_name"] != model_name:
-        _global_cache["encoder"] = load_embedding_model(model_name)
-        _global_cache["model_name"] = model_name
-
     # Load Collection if changed or not loaded
     if _global_cache["collection_name"] != collection_name:
         _global_cache["collection"] = get_db_collection(db_path, collection_name)
         _global_cache["collection_name"] = collection_name
 
-    encoder = _global_cache["encoder"]
+    encoder = model
     collection = _global_cache["collection"]
 
     # 2. Encode Query